@@ -0,0 +1,130 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""C-level S-expression tokenizer for KiCad files.
+
+Builds the same tree as `sexpdata.loads` for the subset KiCad writes: lists, quoted strings,
+ints/floats and bare symbols. Input outside that subset (comments, quotes, [brackets],
+escaped atoms) or malformed input is handed to sexpdata so results and errors match it.
+
+Build with: python setup.py build_ext --inplace
+"""
+from cpython.list cimport PyList_Append
+from sexpdata import Symbol, loads as _sexp_loads
+
+
+class Unsupported(ValueError):
+    pass
+
+
+_ESCAPES = {'\\': '\\', '"': '"', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+cdef inline bint _is_space(char c):
+    return c == b' ' or c == b'\t' or c == b'\n' or c == b'\r' or c == b'\x0b' or c == b'\x0c'
+
+
+cdef object _atom(str tok, dict seen):
+    # same conversion order as sexpdata.Parser.atom with default nil/true/false
+    if tok == 'nil':
+        return []
+    value = seen.get(tok)
+    if value is not None:
+        return value
+    if tok == 't':
+        value = True
+    else:
+        try:
+            value = int(tok)
+        except ValueError:
+            try:
+                value = float(tok)
+            except ValueError:
+                value = Symbol(tok)
+    # atoms repeat heavily in KiCad files and the results are immutable, so share them
+    seen[tok] = value
+    return value
+
+
+cdef str _unescape(bytes raw):
+    cdef list out = []
+    cdef str s = raw.decode('utf-8')
+    cdef Py_ssize_t i = 0, j, n = len(s)
+    while i < n:
+        j = s.find('\\', i)
+        if j < 0 or j + 1 >= n:
+            out.append(s[i:])
+            break
+        out.append(s[i:j])
+        # unknown escapes are kept verbatim, like sexpdata's String.unquote
+        out.append(_ESCAPES.get(s[j+1], s[j:j+2]))
+        i = j + 2
+    return ''.join(out)
+
+
+cpdef list parse(bytes data):
+    """Parse every top-level expression in `data` (UTF-8) into nested lists."""
+    cdef const char* buf = data
+    cdef Py_ssize_t n = len(data)
+    cdef Py_ssize_t i = 0, j
+    cdef char c
+    cdef bint escaped
+    cdef list stack = []
+    cdef list cur = []
+    cdef list child
+    cdef dict seen = {}
+    while i < n:
+        c = buf[i]
+        if _is_space(c):
+            i += 1
+        elif c == b'(':
+            child = []
+            PyList_Append(cur, child)
+            stack.append(cur)
+            cur = child
+            i += 1
+        elif c == b')':
+            if not stack:
+                raise Unsupported('unbalanced )')
+            cur = stack.pop()
+            i += 1
+        elif c == b'"':
+            j = i + 1
+            escaped = False
+            while j < n and buf[j] != b'"':
+                if buf[j] == b'\\':
+                    escaped = True
+                    j += 1
+                j += 1
+            if j >= n:
+                raise Unsupported('unterminated string')
+            if escaped:
+                PyList_Append(cur, _unescape(data[i+1:j]))
+            else:
+                PyList_Append(cur, data[i+1:j].decode('utf-8'))
+            i = j + 1
+        elif c == b';' or c == b"'" or c == b'[' or c == b']':
+            raise Unsupported('not a KiCad S-expression')
+        else:
+            j = i
+            while j < n:
+                c = buf[j]
+                if _is_space(c) or c == b'(' or c == b')' or c == b'"' or c == b';':
+                    break
+                if c == b'\\' or c == b'[' or c == b']':
+                    raise Unsupported('escaped or bracketed atom')
+                j += 1
+            PyList_Append(cur, _atom(data[i:j].decode('utf-8'), seen))
+            i = j
+    if stack:
+        raise Unsupported('unclosed (')
+    return cur
+
+
+def loads(string):
+    """Drop-in for `sexpdata.loads` on KiCad files."""
+    try:
+        obj = parse(string.encode('utf-8'))
+    except Unsupported:
+        return _sexp_loads(string)
+    if len(obj) != 1:
+        return _sexp_loads(string)
+    return obj[0]
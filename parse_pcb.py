@@ -1,5 +1,35 @@
 import sys, json, math
-from sexpdata import loads, Symbol
+from sexpdata import Symbol
+try:
+    from fastsexp import loads  # compiled tokenizer, see setup.py
+except ImportError:
+    from sexpdata import loads
+
+# S-expression heads, built once instead of per node visit
+_S_FOOTPRINT = Symbol('footprint')
+_S_PROPERTY = Symbol('property')
+_S_AT = Symbol('at')
+_S_PATH = Symbol('path')
+_S_PAD = Symbol('pad')
+_S_NET = Symbol('net')
+_S_SIZE = Symbol('size')
+
+class Pad:
+    """One pad in absolute board coordinates; kept compact, turned into a dict only for JSON."""
+    __slots__ = ('x', 'y', 'net', 'sx', 'sy')
+
+    def __init__(self, x, y, net=None, sx=None, sy=None):
+        self.x = x; self.y = y
+        self.net = net
+        self.sx = sx; self.sy = sy
+
+    def to_dict(self):
+        shape = ('size', self.sx, self.sy) if self.sx is not None else None
+        return { 'at': [self.x, self.y], 'net': self.net, 'shape': shape }
+
+def write_json(footprints, path):
+    with open(path,'w',encoding='utf-8') as f:
+        json.dump(footprints,f,indent=2,default=lambda o: o.to_dict())
 
 def parse_file(path):
     with open(path, encoding='utf-8') as f:
@@ -11,7 +41,7 @@ def parse_pcb(tree):
     for node in tree:
         if not isinstance(node, list):
             continue
-        if node and node[0] == Symbol('footprint'):
+        if node and node[0] == _S_FOOTPRINT:
             ref = None
             at = (0.0, 0.0, 0.0)
             lib = None
@@ -21,9 +51,9 @@ def parse_pcb(tree):
                 if not isinstance(child, list):
                     continue
                 head = child[0]
-                if head == Symbol('property') and len(child) >= 3 and child[1] == 'Reference':
+                if head == _S_PROPERTY and len(child) >= 3 and child[1] == 'Reference':
                     ref = child[2]
-                elif head == Symbol('at') and len(child) >= 3:
+                elif head == _S_AT and len(child) >= 3:
                     # footprint origin: (at x y [rot])
                     try:
                         x = float(child[1]); y = float(child[2])
@@ -31,28 +61,28 @@ def parse_pcb(tree):
                         at = (x,y,rot)
                     except Exception:
                         pass
-                elif head == Symbol('path') and len(child) >= 2:
+                elif head == _S_PATH and len(child) >= 2:
                     lib = child[1]
-                elif head == Symbol('pad'):
+                elif head == _S_PAD:
                     # pad can be (pad "1" ... (at x y rot) (net N ...))
                     name = None
                     pad_at = None
-                    shape = None
+                    size = None
                     net = None
                     for p in child[1:]:
                         if not isinstance(p, list):
                             continue
-                        if p[0] == Symbol('at') and len(p) >= 3:
+                        if p[0] == _S_AT and len(p) >= 3:
                             try:
                                 px = float(p[1]); py = float(p[2]);
                                 # ignore pad-level rotation for now
                                 pad_at = (px,py)
                             except Exception:
                                 pass
-                        elif p[0] == Symbol('net') and len(p) >= 2:
+                        elif p[0] == _S_NET and len(p) >= 2:
                             net = p[1]
-                        elif p[0] == Symbol('size') and len(p) >= 3:
-                            shape = ('size', float(p[1]), float(p[2]))
+                        elif p[0] == _S_SIZE and len(p) >= 3:
+                            size = (float(p[1]), float(p[2]))
                         elif isinstance(p[0], str) or isinstance(p[0], Symbol):
                             # other unknown
                             pass
@@ -71,17 +101,24 @@ def parse_pcb(tree):
                         fx,fy,fr = at
                         ax = round(fx + pad_at[0], 4)
                         ay = round(fy + pad_at[1], 4)
-                        pads[name] = { 'at': [ax, ay], 'net': net, 'shape': shape }
+                        if size:
+                            pads[name] = Pad(ax, ay, net, size[0], size[1])
+                        else:
+                            pads[name] = Pad(ax, ay, net)
             if ref:
                 footprints[ref] = { 'lib': lib, 'at': list(at), 'pads': pads }
     return footprints
 
+try:
+    from parse_pcb_cy import parse_pcb, Pad  # compiled versions of the above, see setup.py
+except ImportError:
+    pass
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print('Usage: python parse_pcb.py <file.kicad_pcb>')
         sys.exit(1)
     tree = parse_file(sys.argv[1])
     out = parse_pcb(tree)
-    with open('footprint_data.json','w',encoding='utf-8') as f:
-        json.dump(out,f,indent=2)
+    write_json(out, 'footprint_data.json')
     print('Wrote footprint_data.json')
@@ -0,0 +1,123 @@
+# cython: language_level=3
+"""Compiled `parse_pcb.parse_pcb`: same walk and output, with typed locals.
+
+parse_pcb.py picks this up when it has been built (python setup.py build_ext --inplace).
+"""
+from sexpdata import Symbol
+
+cdef object _S_FOOTPRINT = Symbol('footprint')
+cdef object _S_PROPERTY = Symbol('property')
+cdef object _S_AT = Symbol('at')
+cdef object _S_PATH = Symbol('path')
+cdef object _S_PAD = Symbol('pad')
+cdef object _S_NET = Symbol('net')
+cdef object _S_SIZE = Symbol('size')
+
+
+cdef inline bint _is(object head, object sym):
+    # Symbol.__eq__ (same class, same text) done at C level instead of a Python method call
+    return type(head) is Symbol and <str>head == <str>sym
+
+
+cdef class Pad:
+    """Compiled `parse_pcb.Pad`."""
+    cdef public double x, y
+    cdef public object net, sx, sy
+
+    def __init__(self, double x, double y, net=None, sx=None, sy=None):
+        self.x = x; self.y = y
+        self.net = net
+        self.sx = sx; self.sy = sy
+
+    def to_dict(self):
+        shape = ('size', self.sx, self.sy) if self.sx is not None else None
+        return {'at': [self.x, self.y], 'net': self.net, 'shape': shape}
+
+
+cpdef dict parse_pcb(list tree):
+    cdef dict footprints = {}
+    cdef dict pads
+    cdef list node, child, p
+    cdef object item, head, ref, lib, name, net, raw
+    cdef tuple at
+    cdef double x, y, rot, px, py, fx, fy, sx, sy
+    cdef bint has_pad_at, has_size
+    cdef Py_ssize_t i, j, k, n_node, n_child
+
+    for i in range(len(tree)):
+        item = tree[i]
+        if not isinstance(item, list):
+            continue
+        node = <list>item
+        if node and _is(node[0], _S_FOOTPRINT):
+            ref = None
+            at = (0.0, 0.0, 0.0)
+            lib = None
+            pads = {}
+            n_node = len(node)
+            # walk children
+            for j in range(1, n_node):
+                item = node[j]
+                if not isinstance(item, list):
+                    continue
+                child = <list>item
+                n_child = len(child)
+                head = child[0]
+                if _is(head, _S_PROPERTY) and n_child >= 3 and child[1] == 'Reference':
+                    ref = child[2]
+                elif _is(head, _S_AT) and n_child >= 3:
+                    # footprint origin: (at x y [rot])
+                    try:
+                        x = float(child[1]); y = float(child[2])
+                        rot = float(child[3]) if n_child > 3 else 0.0
+                        at = (x, y, rot)
+                    except Exception:
+                        pass
+                elif _is(head, _S_PATH) and n_child >= 2:
+                    lib = child[1]
+                elif _is(head, _S_PAD):
+                    # pad can be (pad "1" ... (at x y rot) (net N ...))
+                    name = None
+                    has_pad_at = False
+                    px = py = 0.0
+                    has_size = False
+                    sx = sy = 0.0
+                    net = None
+                    for k in range(1, n_child):
+                        item = child[k]
+                        if not isinstance(item, list):
+                            continue
+                        p = <list>item
+                        if _is(p[0], _S_AT) and len(p) >= 3:
+                            try:
+                                x = float(p[1]); y = float(p[2])
+                                # ignore pad-level rotation for now
+                                px = x; py = y
+                                has_pad_at = True
+                            except Exception:
+                                pass
+                        elif _is(p[0], _S_NET) and len(p) >= 2:
+                            net = p[1]
+                        elif _is(p[0], _S_SIZE) and len(p) >= 3:
+                            sx = float(p[1]); sy = float(p[2])
+                            has_size = True
+                    # pad name is the first token after 'pad'
+                    if n_child >= 2:
+                        raw = child[1]
+                        if isinstance(raw, str):
+                            name = raw
+                        else:
+                            try:
+                                name = str(raw)
+                            except Exception:
+                                name = None
+                    if name and has_pad_at:
+                        # absolute pad coords = footprint at + pad offset
+                        fx = at[0]; fy = at[1]
+                        if has_size:
+                            pads[name] = Pad(round(fx + px, 4), round(fy + py, 4), net, sx, sy)
+                        else:
+                            pads[name] = Pad(round(fx + px, 4), round(fy + py, 4), net)
+            if ref:
+                footprints[ref] = {'lib': lib, 'at': list(at), 'pads': pads}
+    return footprints
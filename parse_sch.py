@@ -1,81 +1,182 @@
-import sys, json, math
-from sexpdata import loads, Symbol
+import sys, os, json, math
+from sexpdata import Symbol
+try:
+    from fastsexp import loads  # compiled tokenizer, see setup.py
+except ImportError:
+    from sexpdata import loads
+
+# S-expression heads, built once instead of per node visit
+_S_LIB_SYMBOLS = Symbol("lib_symbols")
+_S_SYMBOL = Symbol("symbol")
+_S_PIN = Symbol("pin")
+_S_NUMBER = Symbol("number")
+_S_AT = Symbol("at")
+_S_LIB_ID = Symbol("lib_id")
+_S_PROPERTY = Symbol("property")
+_S_WIRE = Symbol("wire")
+_S_PTS = Symbol("pts")
+_S_LABEL = Symbol("label")
+_S_GLOBAL_LABEL = Symbol("global_label")
+_S_LABELS = (_S_LABEL, _S_GLOBAL_LABEL)
 
 def parse_file(path):
     with open(path, encoding="utf-8") as f:
         return loads(f.read())
 
-def rotate(x, y, angle):
-    theta = math.radians(angle)
-    return (x*math.cos(theta) - y*math.sin(theta),
-            x*math.sin(theta) + y*math.cos(theta))
+# angle -> (cos, sin); quarter turns are exact so 90/180/270 leave no FP residue
+_rotcache = {0: (1, 0), 90: (0, 1), 180: (-1, 0), 270: (0, -1)}
+
+def _cs(angle):
+    r = _rotcache.get(angle)
+    if r is None:
+        a = angle % 360
+        if a in (0, 90, 180, 270):
+            r = _rotcache[int(a)]
+        else:
+            theta = math.radians(angle)
+            r = (math.cos(theta), math.sin(theta))
+        _rotcache[angle] = r
+    return r
+
+def _centi(v):
+    # schematic coordinate as an int count of 0.01 units; ints hash faster than float
+    # tuples and round-trip exactly, so pins, wire ends and labels match reliably
+    return round(float(v)*100)
+
+# placed-pin count from which the batched numba kernel pays for its import and JIT
+# warm-up (measured break-even is ~1.5M pins); smaller schematics never import numba.
+# Set PARSE_SCH_KERNEL_MIN_PINS (e.g. to 1) to force the kernel path, or change this setting.
+KERNEL_MIN_PINS = int(os.environ.get("PARSE_SCH_KERNEL_MIN_PINS") or 2000000)
+_kernel = None  # (numpy, transform_pins) once loaded, False when numba is unavailable
+
+def _pin_kernel():
+    global _kernel
+    if _kernel is None:
+        try:
+            import numpy as np
+            from numba import njit
+        except ImportError:
+            _kernel = False
+            return _kernel
+
+        @njit(cache=True)
+        def transform_pins(dx, dy, cx, cy, c, s):
+            # rotate + translate every placed pin at once; coords come back as _centi()
+            # ints, with the same operation order as the Python loop in parse_symbols
+            n = dx.shape[0]
+            px = np.empty(n, np.int64)
+            py = np.empty(n, np.int64)
+            for i in range(n):
+                px[i] = np.int64(np.rint((cx[i] + (dx[i]*c[i] - dy[i]*s[i])) * 100.0))
+                py[i] = np.int64(np.rint((cy[i] + (dx[i]*s[i] + dy[i]*c[i])) * 100.0))
+            return px, py
+
+        _kernel = (np, transform_pins)
+    return _kernel
 
 def parse_symbols(tree):
     lib_pins = {}
     placed = {}
-    pin_positions = {}
+    pin_positions = {}  # (x, y) in _centi() units -> "REF:PIN"
 
     # lib_symbols definitions
     # collect pin positions from library symbol definitions (pins can be nested)
     def walk_for_pins(node):
-        # yield pin nodes found anywhere under node
-        if not isinstance(node, list):
-            return
-        if node and node[0] == Symbol("pin"):
-            yield node
-        else:
-            for child in node:
-                if isinstance(child, list):
-                    for p in walk_for_pins(child):
-                        yield p
+        # (number, (x, y)) for every pin found anywhere under node, in document order;
+        # explicit stack, no recursion, and each pin's children are read in the same walk
+        found = []
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if not isinstance(n, list) or not n:
+                continue
+            if n[0] != _S_PIN:
+                stack.extend(reversed(n))
+                continue
+            num, at = None, None
+            for attr in n:
+                if isinstance(attr, list) and attr:
+                    if attr[0] == _S_NUMBER and len(attr) > 1:
+                        num = str(attr[1])
+                    elif attr[0] == _S_AT and len(attr) > 2:
+                        try:
+                            at = (float(attr[1]), float(attr[2]))
+                        except Exception:
+                            at = None
+            if num and at:
+                found.append((num, at))
+        return found
 
+    # single pass over the top level: library definitions and placed symbols
+    lib_defs, placed_nodes = [], []
     for node in tree:
-        if isinstance(node, list) and node and node[0] == Symbol("lib_symbols"):
-            for sym in node[1:]:
-                if isinstance(sym, list) and sym and sym[0] == Symbol("symbol"):
-                    lib_id = sym[1] if len(sym) > 1 else None
-                    if lib_id is None:
-                        continue
-                    lib_id = str(lib_id)
-                    lib_pins.setdefault(lib_id, {})
-                    # find all pin nodes anywhere inside this lib symbol
-                    for pin_node in walk_for_pins(sym):
-                        num, at = None, None
-                        for attr in pin_node:
-                            if isinstance(attr, list):
-                                if attr and attr[0] == Symbol("number") and len(attr) > 1:
-                                    num = str(attr[1])
-                                elif attr and attr[0] == Symbol("at") and len(attr) > 2:
-                                    try:
-                                        at = (float(attr[1]), float(attr[2]))
-                                    except Exception:
-                                        at = None
-                        if num and at:
-                            lib_pins[lib_id][num] = at
+        if isinstance(node, list) and node:
+            if node[0] == _S_LIB_SYMBOLS:
+                lib_defs.append(node)
+            elif node[0] == _S_SYMBOL:
+                placed_nodes.append(node)
+
+    for node in lib_defs:
+        for sym in node[1:]:
+            if isinstance(sym, list) and sym and sym[0] == _S_SYMBOL:
+                lib_id = sym[1] if len(sym) > 1 else None
+                if lib_id is None:
+                    continue
+                lib_id = str(lib_id)
+                lib_pins.setdefault(lib_id, {})
+                # find all pins anywhere inside this lib symbol
+                for num, at in walk_for_pins(sym):
+                    lib_pins[lib_id][num] = at
     # done parsing library symbols
 
-    # placed symbols
-    for node in tree:
-        if isinstance(node, list) and node and node[0] == Symbol("symbol"):
-            ref, lib_id, at, value = None, None, (0,0,0), None
-            for sub in node:
-                if isinstance(sub, list):
-                    if sub[0] == Symbol("lib_id"):
-                        lib_id = sub[1]
-                    elif sub[0] == Symbol("at"):
-                        at = (float(sub[1]), float(sub[2]), float(sub[3]) if len(sub)>3 else 0)
-                    elif sub[0] == Symbol("property"):
-                        if sub[1]=="Reference": ref=sub[2]
-                        if sub[1]=="Value": value=sub[2]
-            if ref and lib_id in lib_pins:
-                cx, cy, rot = at
-                pins = {}
-                for num,(dx,dy) in lib_pins[lib_id].items():
-                    rx, ry = rotate(dx, dy, rot)
-                    px, py = round(cx+rx,2), round(cy+ry,2)
-                    pins[num]=(px,py)
-                    pin_positions[(px,py)] = f"{ref}:{num}"
-                placed[ref]={"lib_id":lib_id,"value":value,"pins":pins}
+    # placed symbols: collect the instances first so every pin can be transformed in one go
+    instances = []
+    for node in placed_nodes:
+        ref, lib_id, at, value = None, None, (0,0,0), None
+        for sub in node:
+            if isinstance(sub, list):
+                if sub[0] == _S_LIB_ID:
+                    lib_id = sub[1]
+                elif sub[0] == _S_AT:
+                    at = (float(sub[1]), float(sub[2]), float(sub[3]) if len(sub)>3 else 0)
+                elif sub[0] == _S_PROPERTY:
+                    if sub[1]=="Reference": ref=sub[2]
+                    if sub[1]=="Value": value=sub[2]
+        if ref and lib_id in lib_pins:
+            instances.append((ref, lib_id, value, at))
+
+    # pin coordinates in instance/pin order, as _centi() ints
+    npins = sum(len(lib_pins[inst[1]]) for inst in instances)
+    kernel = _pin_kernel() if npins and npins >= KERNEL_MIN_PINS else False
+    if kernel:
+        np, transform_pins = kernel
+        # per-library offset arrays, concatenated per instance; origins/rotations repeated
+        lib_xy = {lib_id: np.array(list(lp.values()), dtype=np.float64).reshape(-1, 2)
+                  for lib_id, lp in lib_pins.items() if lp}
+        xy = np.concatenate([lib_xy[inst[1]] for inst in instances if inst[1] in lib_xy])
+        counts = [len(lib_pins[inst[1]]) for inst in instances]
+        per_inst = np.array([(x0, y0) + tuple(_cs(rot)) for _, _, _, (x0, y0, rot) in instances],
+                            dtype=np.float64)
+        cx, cy, c, s = np.repeat(per_inst, counts, axis=0).T
+        pxs, pys = transform_pins(xy[:, 0].copy(), xy[:, 1].copy(), cx.copy(), cy.copy(), c.copy(), s.copy())
+        coords = list(zip(pxs.tolist(), pys.tolist()))
+    else:
+        coords = []
+        for _, lib_id, _, (x0, y0, rot) in instances:
+            c0, s0 = _cs(rot)
+            for ddx, ddy in lib_pins[lib_id].values():
+                rx, ry = ddx*c0 - ddy*s0, ddx*s0 + ddy*c0
+                coords.append((_centi(x0+rx), _centi(y0+ry)))
+
+    k = 0
+    for ref, lib_id, value, _ in instances:
+        pins = {}
+        for num in lib_pins[lib_id]:
+            px, py = coords[k]; k += 1
+            # pins keep the schematic's float units; only the lookup keys are _centi() ints
+            pins[num]=(px/100,py/100)
+            pin_positions[(px,py)] = f"{ref}:{num}"
+        placed[ref]={"lib_id":lib_id,"value":value,"pins":pins}
     return placed, pin_positions
 
 def parse_wires_and_labels(tree):
@@ -83,24 +184,29 @@ def parse_wires_and_labels(tree):
     labels={}
     for node in tree:
         if isinstance(node, list):
-            if node[0]==Symbol("wire"):
+            if node[0]==_S_WIRE:
                 for sub in node:
-                    if isinstance(sub,list) and sub[0]==Symbol("pts"):
-                        pts=[(round(float(p[1]),2), round(float(p[2]),2)) for p in sub[1:]]
+                    if isinstance(sub,list) and sub[0]==_S_PTS:
+                        pts=[(_centi(p[1]), _centi(p[2])) for p in sub[1:]]
                         for a,b in zip(pts,pts[1:]): segments.append((a,b))
-            if node[0] in (Symbol("label"), Symbol("global_label")):
-                x=float(node[1]); y=float(node[2])
-                labels[(round(x,2),round(y,2))]=node[3]
+            if node[0] in _S_LABELS:
+                labels[(_centi(node[1]),_centi(node[2]))]=node[3]
     return segments, labels
 
 def unionfind(nodes, edges):
     parent={n:n for n in nodes}
+    size={n:1 for n in nodes}
     def find(x):
-        if parent[x]!=x: parent[x]=find(parent[x])
-        return parent[x]
+        # iterative: walk to the root, then point every node on the path at it
+        r=x
+        while parent[r]!=r: r=parent[r]
+        while parent[x]!=r: parent[x],x=r,parent[x]
+        return r
     def union(a,b):
         ra,rb=find(a),find(b)
-        if ra!=rb: parent[rb]=ra
+        if ra==rb: return
+        if size[ra]<size[rb]: ra,rb=rb,ra
+        parent[rb]=ra; size[ra]+=size[rb]
     for a,b in edges: union(a,b)
     groups={}
     for n in nodes:
@@ -114,11 +220,11 @@ def parse_kicad(path):
 
     # continue without debug prints
 
-    # graph nodes = wire endpoints + pin endpoints + labels
-    nodes=set()
-    for a,b in segs: nodes|={a,b}
-    nodes|=set(pin_pos.keys())
-    nodes|=set(labels.keys())
+    # graph nodes = wire endpoints + pin endpoints + labels; a dict rather than a set so
+    # groups (and so net numbering) follow document order instead of hash order
+    nodes=dict.fromkeys(p for seg in segs for p in seg)
+    nodes.update(dict.fromkeys(pin_pos))
+    nodes.update(dict.fromkeys(labels))
 
     groups=unionfind(nodes,segs)
     nets={}
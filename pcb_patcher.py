@@ -3,36 +3,60 @@
 
 Assumptions:
 - GRID_W, GRID_H, MAP_PADDING, and padding must match the values used by `snake_game.py`.
-- This script uses `sexpdata` to parse and write the PCB S-expression.
+- The PCB is never parsed or rewritten: `append_tracks` appends the new segments in place before
+  the file's final ')', after `_balanced` checks that the appended text is itself balanced.
+- `load_net_names`, `net_names_from_tree` and `find_net_name` are library helpers for callers
+  that need net names; `snake_game.py` routes by net index and does not use them.
 """
 import json
+import os
 import shutil
-from sexpdata import loads, Symbol
+from sexpdata import Symbol
 import math
 import re
 
+try:
+    import numpy as np
+except ImportError:  # fall back to plain min()/max() over lists
+    np = None
+
+# S-expression heads, built once instead of per node visit
+_S_NET = Symbol('net')
+
 # These must match snake_game.py settings unless you pass custom values
 GRID_W = 60
 GRID_H = 24
 MAP_PADDING = 4
 PADDING = 2
 
+# abspath of a PCB -> (mtime_ns, {net index: net name}); only the latest scan of each file is kept
+_net_name_cache = {}
+# (tree, len(tree), {net index: net name}) for the last tree passed to find_net_name
+_tree_net_names = None
+# (abspath, mtime_ns) of a footprint JSON -> bounds dict from compute_bounds_from_footprints
+_bounds_cache = {}
+
 
 def compute_bounds_from_footprints(footprint_path):
+    key = (os.path.abspath(footprint_path), os.stat(footprint_path).st_mtime_ns)
+    if key in _bounds_cache:
+        return _bounds_cache[key]
     with open(footprint_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    xs = []
-    ys = []
-    for ref, fp in data.items():
-        for pn, pinfo in fp.get('pads', {}).items():
-            at = pinfo.get('at')
-            if at:
-                xs.append(float(at[0]))
-                ys.append(float(at[1]))
-    if not xs:
+    ats = [pinfo.get('at') for fp in data.values() for pinfo in fp.get('pads', {}).values()]
+    ats = [at for at in ats if at]
+    if not ats:
         raise ValueError('No pad coordinates found in footprint data')
-    minx, maxx = min(xs), max(xs)
-    miny, maxy = min(ys), max(ys)
+    if np is not None:
+        xy = np.fromiter((float(c) for at in ats for c in (at[0], at[1])),
+                         dtype=np.float64, count=2*len(ats)).reshape(-1, 2)
+        minx, miny = (float(v) for v in xy.min(axis=0))
+        maxx, maxy = (float(v) for v in xy.max(axis=0))
+    else:
+        xs = [float(at[0]) for at in ats]
+        ys = [float(at[1]) for at in ats]
+        minx, maxx = min(xs), max(xs)
+        miny, maxy = min(ys), max(ys)
     # avoid zero-range
     if abs(maxx-minx) < 1e-6:
         maxx = minx + 1.0
@@ -40,7 +64,11 @@ def compute_bounds_from_footprints(footprint_path):
         maxy = miny + 1.0
     gw = max(1, GRID_W - PADDING*2 - MAP_PADDING)
     gh = max(1, GRID_H - PADDING*2 - MAP_PADDING)
-    return { 'minx': minx, 'maxx': maxx, 'miny': miny, 'maxy': maxy, 'gw': gw, 'gh': gh }
+    bounds = { 'minx': minx, 'maxx': maxx, 'miny': miny, 'maxy': maxy, 'gw': gw, 'gh': gh,
+               # reciprocals so grid_to_pcb multiplies instead of dividing per point
+               'inv_gw': 1.0 / max(1, gw-1), 'inv_gh': 1.0 / max(1, gh-1) }
+    _bounds_cache[key] = bounds
+    return bounds
 
 
 def grid_to_pcb(gx, gy, bounds):
@@ -49,8 +77,10 @@ def grid_to_pcb(gx, gy, bounds):
     miny, maxy = bounds['miny'], bounds['maxy']
     gw, gh = bounds['gw'], bounds['gh']
     # compute normalized fractions
-    fx = (gx - PADDING - MAP_PADDING//2) / float(max(1, gw-1))
-    fy = (gy - PADDING - MAP_PADDING//2) / float(max(1, gh-1))
+    inv_gw = bounds.get('inv_gw') or 1.0 / max(1, gw-1)
+    inv_gh = bounds.get('inv_gh') or 1.0 / max(1, gh-1)
+    fx = (gx - PADDING - MAP_PADDING//2) * inv_gw
+    fy = (gy - PADDING - MAP_PADDING//2) * inv_gh
     # clamp
     fx = max(0.0, min(1.0, fx))
     fy = max(0.0, min(1.0, fy))
@@ -59,16 +89,121 @@ def grid_to_pcb(gx, gy, bounds):
     return (round(x, 4), round(y, 4))
 
 
-def find_net_name(tree, net_idx):
+def make_grid_to_pcb(bounds):
+    """Return pcb_of(gx, gy), grid_to_pcb specialised to `bounds` with its constants hoisted."""
+    off = PADDING + MAP_PADDING//2
+    minx, miny = bounds['minx'], bounds['miny']
+    spanx, spany = bounds['maxx'] - minx, bounds['maxy'] - miny
+    inv_gw = bounds.get('inv_gw') or 1.0 / max(1, bounds['gw']-1)
+    inv_gh = bounds.get('inv_gh') or 1.0 / max(1, bounds['gh']-1)
+
+    def pcb_of(gx, gy):
+        fx = (gx - off) * inv_gw
+        fy = (gy - off) * inv_gh
+        # clamp; points off the mapped area are rare
+        if fx < 0.0 or fx > 1.0:
+            fx = max(0.0, min(1.0, fx))
+        if fy < 0.0 or fy > 1.0:
+            fy = max(0.0, min(1.0, fy))
+        return (round(minx + fx * spanx, 4), round(miny + fy * spany, 4))
+
+    return pcb_of
+
+
+def net_names_from_tree(tree):
+    """Collect every top-level (net <idx> "<name>") into a {idx: name} dict in one pass."""
+    names = {}
     for node in tree:
-        if isinstance(node, list) and node:
-            if node[0] == Symbol('net') and len(node) >= 3:
-                try:
-                    if int(node[1]) == int(net_idx):
-                        return node[2]
-                except Exception:
-                    pass
-    return ''
+        if isinstance(node, list) and node and node[0] == _S_NET and len(node) >= 3:
+            try:
+                names[int(node[1])] = str(node[2])
+            except Exception:
+                pass
+    return names
+
+
+_NET_RE = re.compile(r'\(net\s+(\d+)\s+"([^"]*)"\)')
+
+
+def load_net_names(kicad_pcb_path):
+    """Return {net_idx: net_name} for a .kicad_pcb, rescanning it only when the file changed.
+
+    append_tracks changes the file, so the entry is replaced (not added to) after each routed net.
+    """
+    path = os.path.abspath(kicad_pcb_path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _net_name_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    names = {}
+    # one regex pass, no S-expression parse; the first (top-level) declaration wins
+    for m in _NET_RE.finditer(text):
+        names.setdefault(int(m.group(1)), m.group(2))
+    _net_name_cache[path] = (mtime, names)
+    return names
+
+
+def find_net_name(tree, net_idx):
+    """Return the name of net `net_idx` in a parsed PCB tree, or ''.
+
+    The {idx: name} table is built once and reused while the same tree (same object, same
+    length) is passed in; only that one tree is held, so its id() can't be recycled.
+    """
+    global _tree_net_names
+    cached = _tree_net_names
+    if cached is None or cached[0] is not tree or cached[1] != len(tree):
+        cached = _tree_net_names = (tree, len(tree), net_names_from_tree(tree))
+    try:
+        return cached[2].get(int(net_idx), '')
+    except Exception:
+        return ''
+
+
+def _balanced(text):
+    """Paren depth left open at the end of `text`, skipping quoted strings; 0 means balanced.
+
+    An unterminated string counts as one more open level.
+    """
+    depth = 0
+    in_str = False
+    escaped = False
+    for c in text:
+        if in_str:
+            if escaped:
+                escaped = False
+            elif c == '\\':
+                escaped = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+    return depth if not in_str else depth + 1
+
+
+def _append_before_close(path, text, tail_size=65536):
+    """Insert `text` before the file's final ')' without rewriting the rest of the file.
+
+    Only the last `tail_size` bytes are read: trailing whitespace and the closing paren are
+    truncated away, then `text` and a fresh ')' are written in their place.
+    """
+    with open(path, 'r+b') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        start = max(0, size - tail_size)
+        f.seek(start)
+        tail = f.read().rstrip()
+        if not tail.endswith(b')'):
+            raise ValueError('Unexpected PCB file format: does not end with )')
+        cut = start + len(tail[:-1].rstrip())
+        f.seek(cut)
+        f.truncate()
+        f.write(b'\n' + text.encode('utf-8') + b'\n)\n')
 
 
 def append_tracks(kicad_pcb_path, footprint_data_path, net_idx, ordered_grid_points, width_mm=0.5, layer='F.Cu'):
@@ -82,25 +217,12 @@ def append_tracks(kicad_pcb_path, footprint_data_path, net_idx, ordered_grid_poi
     bounds = compute_bounds_from_footprints(footprint_data_path)
     seg_width = float(width_mm)
 
-    # read original file text
-    with open(kicad_pcb_path, 'r', encoding='utf-8') as f:
-        orig = f.read()
-
-    # try to discover net name by regex in the file: (net <idx> "NAME")
-    net_name = ''
-    try:
-        pat = re.compile(r"\(net\s+%d\s+\"([^\"]*)\"\)" % int(net_idx))
-        m = pat.search(orig)
-        if m:
-            net_name = m.group(1)
-    except Exception:
-        net_name = ''
-
     # build textual segment S-expr lines
     seg_lines = []
-    for a, b in zip(ordered_grid_points[:-1], ordered_grid_points[1:]):
-        ax, ay = grid_to_pcb(a[0], a[1], bounds)
-        bx, by = grid_to_pcb(b[0], b[1], bounds)
+    pcb_of = make_grid_to_pcb(bounds)
+    # convert each point once; consecutive segments share their end/start point
+    pcb_points = [pcb_of(p[0], p[1]) for p in ordered_grid_points]
+    for (ax, ay), (bx, by) in zip(pcb_points[:-1], pcb_points[1:]):
         line = '\t(segment (start %s %s) (end %s %s) (width %s) (layer "%s") (net %s))' % (
             format(ax, '.4f'), format(ay, '.4f'), format(bx, '.4f'), format(by, '.4f'),
             format(seg_width, '.4f'), layer, int(net_idx))
@@ -109,21 +231,16 @@ def append_tracks(kicad_pcb_path, footprint_data_path, net_idx, ordered_grid_poi
     if not seg_lines:
         return 0
 
-    # insert before final closing paren of file: remove trailing whitespace, drop one trailing ')' and re-close
-    s = orig.rstrip()
-    if not s.endswith(')'):
-        raise ValueError('Unexpected PCB file format: does not end with )')
-    s_no_end = s[:-1].rstrip()
-    new_text = s_no_end + '\n' + '\n'.join(seg_lines) + '\n)\n'
+    # the file was valid before, so checking just the new text keeps it valid
+    seg_text = '\n'.join(seg_lines)
+    if _balanced(seg_text) != 0:
+        raise ValueError('Generated segments are not a balanced S-expression')
 
-    with open(kicad_pcb_path, 'w', encoding='utf-8') as f:
-        f.write(new_text)
-
-    # quick parse check
+    # insert before final closing paren of file, touching only the tail of the file
     try:
-        loads(new_text)
-    except Exception:
-        # if parse fails, restore backup and raise
+        _append_before_close(kicad_pcb_path, seg_text)
+    except OSError:
+        # if the write fails part-way, restore backup and raise
         shutil.copy(kicad_pcb_path + '.bak', kicad_pcb_path)
         raise
 
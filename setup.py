@@ -0,0 +1,13 @@
+"""Builds the optional Cython accelerators in place:
+
+    python setup.py build_ext --inplace
+
+The scripts fall back to pure Python (sexpdata) when the extensions are not built.
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='hackmit-2025',
+    ext_modules=cythonize(['fastsexp.pyx', 'parse_pcb_cy.pyx'], language_level=3),
+)
@@ -14,10 +14,19 @@ import curses
 import json
 import time
 import os
-from collections import deque
+import glob
+from array import array
+from importlib.machinery import EXTENSION_SUFFIXES
+
+try:
+    import numpy as np
+except ImportError:  # fall back to the pure-Python mapping below
+    np = None
 
 DATA_FILE = 'footprint_data.json'
 SCHEM_FILE = 'schematic_data.json'
+KICAD_PCB = 'hackmit_2025.kicad_pcb'
+KICAD_SCH = 'hackmit_2025.kicad_sch'
 GRID_W = 80
 GRID_H = 40
 MAP_PADDING = 4  # extra padding around components when mapping
@@ -50,24 +59,72 @@ def load_pads(path):
 def map_to_grid(pads, width, height, padding=2):
     if not pads:
         return []
-    xs = [p[2] for p in pads]
-    ys = [p[3] for p in pads]
-    minx, maxx = min(xs), max(xs)
-    miny, maxy = min(ys), max(ys)
+    if np is not None:
+        xy = np.fromiter((c for p in pads for c in (p[2], p[3])),
+                         dtype=np.float64, count=2*len(pads)).reshape(-1, 2)
+        xs, ys = xy[:, 0], xy[:, 1]
+        minx, maxx = float(xs.min()), float(xs.max())
+        miny, maxy = float(ys.min()), float(ys.max())
+    else:
+        xs = [p[2] for p in pads]
+        ys = [p[3] for p in pads]
+        minx, maxx = min(xs), max(xs)
+        miny, maxy = min(ys), max(ys)
     if maxx - minx < 1e-6:
         maxx = minx + 1.0
     if maxy - miny < 1e-6:
         maxy = miny + 1.0
     gw = max(1, width - padding*2 - MAP_PADDING)
     gh = max(1, height - padding*2 - MAP_PADDING)
+    off = padding + MAP_PADDING//2
+    if np is not None:
+        # np.rint rounds half to even, same as round()
+        gxs = off + np.rint((xs - minx) / (maxx - minx) * (gw-1)).astype(np.int32)
+        gys = off + np.rint((ys - miny) / (maxy - miny) * (gh-1)).astype(np.int32)
+        return [(p[0], p[1], gx, gy) for p, gx, gy in zip(pads, gxs.tolist(), gys.tolist())]
     mapped = []
     for ref,pn,x,y in pads:
-        gx = padding + MAP_PADDING//2 + int(round((x - minx) / (maxx - minx) * (gw-1)))
-        gy = padding + MAP_PADDING//2 + int(round((y - miny) / (maxy - miny) * (gh-1)))
+        gx = off + int(round((x - minx) / (maxx - minx) * (gw-1)))
+        gy = off + int(round((y - miny) / (maxy - miny) * (gh-1)))
         mapped.append((ref,pn,gx,gy))
     return mapped
 
 
+def _parser_files(*modules):
+    # the parser scripts plus any built extension of them, e.g. parse_pcb_cy.cpython-311-*.so
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = []
+    for m in modules:
+        files.append(os.path.join(here, m + '.py'))
+        files.extend(f for f in glob.glob(os.path.join(here, m + '.*'))
+                     if f.endswith(tuple(EXTENSION_SUFFIXES)))
+    return files
+
+
+def _maybe_regen(src, dst, fn, deps=()):
+    # rebuild dst if it is missing or older than its KiCad source or the code that parses it,
+    # so output from an older parser isn't reused after the parser changes
+    if not os.path.exists(src):
+        return
+    if os.path.exists(dst):
+        newest = max(os.path.getmtime(f) for f in (src,) + tuple(deps) if os.path.exists(f))
+        if newest <= os.path.getmtime(dst):
+            return
+    fn()
+
+
+def regen_pcb():
+    import parse_pcb
+    parse_pcb.write_json(parse_pcb.parse_pcb(parse_pcb.parse_file(KICAD_PCB)), DATA_FILE)
+
+
+def regen_sch():
+    import parse_sch
+    out = parse_sch.parse_kicad(KICAD_SCH)
+    with open(SCHEM_FILE,'w',encoding='utf-8') as f:
+        json.dump(out,f,indent=2)
+
+
 def run(stdscr):
     curses.curs_set(0)
     stdscr.nodelay(True)
@@ -131,15 +188,14 @@ def run(stdscr):
             stdscr.nodelay(True)
 
     # check data files
-    # regenerate footprint and schematic JSONs by calling the parsers if available
-    try:
-        # prefer to run local scripts directly
-        import subprocess
-        subprocess.run(['python3','parse_pcb.py','hackmit_2025.kicad_pcb'], check=False)
-        subprocess.run(['python3','parse_sch.py','hackmit_2025.kicad_sch'], check=False)
-    except Exception:
-        # ignore failures here; we'll check files below
-        pass
+    # regenerate footprint and schematic JSONs in-process when the KiCad files or parsers are newer
+    for src, dst, fn, deps in ((KICAD_PCB, DATA_FILE, regen_pcb, _parser_files('parse_pcb', 'parse_pcb_cy', 'fastsexp')),
+                               (KICAD_SCH, SCHEM_FILE, regen_sch, _parser_files('parse_sch', 'fastsexp'))):
+        try:
+            _maybe_regen(src, dst, fn, deps)
+        except Exception:
+            # ignore failures here; we'll check files below
+            pass
 
     if not os.path.exists(DATA_FILE) or not os.path.exists(SCHEM_FILE):
         # no interactive key prompts: show message briefly then exit
@@ -151,14 +207,24 @@ def run(stdscr):
     pad_map = {}
     for ref,pn,x,y in mapped:
         pad_map[f"{ref}:{pn}"] = (x,y)
-    # reverse mapping: (x,y) -> pad_key
-    coord_to_pad = { (x,y): f"{ref}:{pn}" for ref,pn,x,y in mapped }
+    # reverse mapping: cell index (y*GRID_W + x) -> pad_key, None where there is no pad
+    coord_to_pad = [None] * (GRID_W*GRID_H)
+    for ref,pn,x,y in mapped:
+        coord_to_pad[y*GRID_W + x] = f"{ref}:{pn}"
 
     with open(SCHEM_FILE,'r',encoding='utf-8') as f:
         schem = json.load(f)
     nets = schem.get('nets', {})
 
-    occupied = {}  # (x,y) -> char
+    # pad -> PCB net index, read once; the footprint JSON doesn't change mid-session
+    with open(DATA_FILE,'r',encoding='utf-8') as f:
+        fp_data = json.load(f)
+    pin_to_netidx = {f"{ref}:{pin}": info.get('net')
+                     for ref,fp in fp_data.items()
+                     for pin,info in fp.get('pads',{}).items()}
+
+    occupied = bytearray(GRID_W*GRID_H)  # y*GRID_W + x -> ord(net char), 0 = free
+    rows = [bytearray(GRID_W) for _ in range(GRID_H)]  # what is on screen, one buffer per row
     net_chars = list('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
     net_names = list(nets.keys())
 
@@ -182,20 +248,60 @@ def run(stdscr):
         start_pin = apples[0]
         start_x, start_y = pad_map[start_pin]
 
-        if (start_x,start_y) in occupied:
+        if occupied[start_y*GRID_W + start_x]:
             # invalid routing: pause indefinitely so user can inspect/kill program
             pause_forever(0, 0, f"Invalid routing detected: start pin for net {net_name} on existing trace. Program paused.")
 
         # helper to (re)initialize snake state for this net
         def init_snake():
-            s = deque()
-            for i in range(3):
+            # body holds packed cells (y*GRID_W + x) tail-first, so the head is s[-1];
+            # the snake never drops its tail, so it only ever grows at the end
+            s = array('i')
+            t = bytearray(GRID_W*GRID_H)  # cells visited by this net's snake
+            for i in (2, 1, 0):
                 x0 = (start_x - i) % GRID_W
                 y0 = start_y % GRID_H
-                s.append((x0,y0))
-            return s, (1,0), set(s), 1, 1
+                s.append(y0*GRID_W + x0)
+                t[y0*GRID_W + x0] = 1
+            return s, (1,0), t, 1, 1
+
+        def cell_char(x, y):
+            # what a full repaint shows at (x,y), ignoring the apple marker
+            i = y*GRID_W + x
+            if trail[i]:
+                return ch
+            if occupied[i]:
+                return chr(occupied[i])
+            if coord_to_pad[i] is not None:
+                return '.'
+            if x in (0, GRID_W-1) or y in (0, GRID_H-1):
+                return '#'
+            return ' '
+
+        def draw_status():
+            try:
+                stdscr.addstr(GRID_H, 0, f"Routing net {net_name} ({net_index+1}/{total_nets})  Collected: {score}/{len(apples)}  q=quit")
+            except curses.error:
+                pass
+
+        def draw_row(y):
+            try:
+                # clip to the terminal width so a narrow window doesn't wrap the row onto the next line
+                stdscr.addstr(y, 0, rows[y][:stdscr.getmaxyx()[1]].decode())
+            except curses.error:
+                pass
+
+        def paint_board():
+            # full repaint, one addstr per row; only needed when a net starts or its snake restarts
+            stdscr.erase()
+            for y in range(GRID_H):
+                rows[y][:] = ''.join(cell_char(x, y) for x in range(GRID_W)).encode()
+                draw_row(y)
+            draw_status()
 
         snake, direction, trail, apple_idx, score = init_snake()
+        paint_board()
+        apple_cell, shown_score = None, score
 
         last_time = time.time()
 
@@ -216,13 +322,14 @@ def run(stdscr):
             elif k == ord('q'):
                 return
 
-            hx,hy = snake[0]
+            hx,hy = snake[-1] % GRID_W, snake[-1] // GRID_W
             nx,ny = hx + direction[0], hy + direction[1]
             nx = (nx + GRID_W) % GRID_W
             ny = (ny + GRID_H) % GRID_H
+            idx = ny*GRID_W + nx
 
             # collision with existing routed trace
-            if (nx,ny) in occupied:
+            if occupied[idx]:
                 # offer restart instead of pausing forever
                 try:
                     stdscr.addstr(GRID_H+1, 0, f"Collision: net {net_name} hit existing trace. Press any key to restart this snake, or 'q' to quit.")
@@ -235,11 +342,13 @@ def run(stdscr):
                     return
                 # restart snake
                 snake, direction, trail, apple_idx, score = init_snake()
+                paint_board()
+                apple_cell, shown_score = None, score
                 last_time = time.time()
                 continue
 
             # collision with a pad that's not part of the current net
-            hit_pad = coord_to_pad.get((nx, ny))
+            hit_pad = coord_to_pad[idx]
             if hit_pad is not None and hit_pad not in apples:
                 try:
                     stdscr.addstr(GRID_H+1, 0, f"Collision: net {net_name} hit pad {hit_pad} not in this net. Press any key to restart this snake, or 'q' to quit.")
@@ -251,11 +360,13 @@ def run(stdscr):
                 if k == ord('q'):
                     return
                 snake, direction, trail, apple_idx, score = init_snake()
+                paint_board()
+                apple_cell, shown_score = None, score
                 last_time = time.time()
                 continue
 
-            snake.appendleft((nx,ny))
-            trail.add((nx,ny))
+            snake.append(idx)
+            trail[idx] = 1
 
             if apple_idx < len(apples):
                 target_pin = apples[apple_idx]
@@ -267,76 +378,52 @@ def run(stdscr):
                 score += 1
                 apple_idx += 1
 
-            # draw
-            stdscr.erase()
-            for x in range(GRID_W):
-                try:
-                    stdscr.addch(0, x, '#')
-                    stdscr.addch(GRID_H-1, x, '#')
-                except curses.error:
-                    pass
-            for y in range(GRID_H):
-                try:
-                    stdscr.addch(y, 0, '#')
-                    stdscr.addch(y, GRID_W-1, '#')
-                except curses.error:
-                    pass
-
-            for key,(px,py) in pad_map.items():
-                try:
-                    stdscr.addch(py, px, '.')
-                except curses.error:
-                    pass
-
-            for (ox,oy), oc in occupied.items():
-                try:
-                    stdscr.addch(oy, ox, oc)
-                except curses.error:
-                    pass
-
-            for (tx,ty) in trail:
-                try:
-                    stdscr.addch(ty, tx, ch)
-                except curses.error:
-                    pass
-
+            # update the row buffers for what changed (the new head, the apple marker's old and
+            # new cell) and redraw just those rows
+            dirty = [(nx, ny)]
+            if apple_cell is not None:
+                dirty.append(apple_cell)
+            dirty_rows = set()
+            for (x, y) in dirty:
+                rows[y][x] = ord(cell_char(x, y))
+                dirty_rows.add(y)
+            apple_cell = None
             if apple_idx < len(apples):
-                try:
-                    stdscr.addch(ay, ax, 'A')
-                except curses.error:
-                    pass
-
-            try:
-                stdscr.addstr(GRID_H, 0, f"Routing net {net_name} ({net_index+1}/{total_nets})  Collected: {score}/{len(apples)}  q=quit")
-            except curses.error:
-                pass
+                apple_cell = (ax, ay)
+                rows[ay][ax] = ord('A')
+                dirty_rows.add(ay)
+            for y in dirty_rows:
+                draw_row(y)
+
+            if score != shown_score:
+                draw_status()
+                shown_score = score
             stdscr.refresh()
 
         # mark occupied cells for this net
-        for coord in trail:
-            occupied[coord] = ch
+        och = ord(ch)
+        for i, t in enumerate(trail):
+            if t:
+                occupied[i] = och
 
         # attempt to write traces back to PCB once for this net
         try:
             from pcb_patcher import append_tracks
             # convert trail (set) to an ordered list following snake body order
-            ordered = list(snake)  # snake deque head-to-tail covers recent path
+            ordered = [(i % GRID_W, i // GRID_W) for i in reversed(snake)]  # head-to-tail
             # ensure we include entire trail set in order by extending with any leftover trail points
-            trail_set = set(trail)
+            trail_set = {(i % GRID_W, i // GRID_W) for i, t in enumerate(trail) if t}
             for p in reversed(ordered):
                 if p in trail_set:
                     trail_set.remove(p)
             remaining = list(trail_set)
             ordered_grid_points = [(p[0], p[1]) for p in ordered] + remaining
             # call patcher (net idx comes from pad net mapping; find from pad_map and schem nets)
-            # pick net index by reading first pad's net from footprint JSON
-            fp = json.load(open(DATA_FILE,'r',encoding='utf-8'))
+            # pick net index from the first pad's net in the footprint JSON
             first_pin = apples[0]
-            # first_pin format 'REF:PIN'
-            ref, pin = first_pin.split(':')
-            net_idx = fp.get(ref,{}).get('pads',{}).get(pin,{}).get('net')
+            net_idx = pin_to_netidx.get(first_pin)
             if net_idx is not None:
-                appended = append_tracks(os.path.join(os.getcwd(), 'hackmit_2025.kicad_pcb'),
+                appended = append_tracks(os.path.join(os.getcwd(), KICAD_PCB),
                                          os.path.join(os.getcwd(), DATA_FILE),
                                          net_idx,
                                          ordered_grid_points,